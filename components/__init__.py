@@ -3,17 +3,23 @@ from .st_chessboard import (
     reset_game,
     initialize_game_state,
     get_legal_moves,
+    get_legal_moves_mask,
     is_valid_move,
     make_move,
     get_game_status,
     coordinate_to_position,
     position_to_coordinate,
+    square_to_position,
+    square_to_coordinate,
+    mask_to_coordinates,
     validate_coordinate,
     validate_coordinate_with_piece,
     validate_move,
     is_en_passant_move,
     is_castling_move,
     get_castling_type,
+    get_castling_rights,
+    get_en_passant_square,
     get_captured_pieces_display,
     get_material_advantage,
 )
@@ -23,17 +29,23 @@ __all__ = [
     "reset_game",
     "initialize_game_state",
     "get_legal_moves",
+    "get_legal_moves_mask",
     "is_valid_move",
     "make_move",
     "get_game_status",
     "coordinate_to_position",
     "position_to_coordinate",
+    "square_to_position",
+    "square_to_coordinate",
+    "mask_to_coordinates",
     "validate_coordinate",
     "validate_coordinate_with_piece",
     "validate_move",
     "is_en_passant_move",
     "is_castling_move",
     "get_castling_type",
+    "get_castling_rights",
+    "get_en_passant_square",
     "get_captured_pieces_display",
     "get_material_advantage",
 ]
@@ -0,0 +1,431 @@
+import random
+from array import array
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, List, Sequence, Tuple
+
+
+# Squares are numbered row * 8 + col, matching the list board layout
+# (square 0 is a8, square 63 is h1). Bit ``1 << sq`` marks a square.
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+ROW_2 = 0xFF << 16  # Rank 6, black's single-push row a double push continues from
+ROW_5 = 0xFF << 40  # Rank 3, white's single-push row a double push continues from
+
+PIECE_FIELDS = {
+    "P": "white_pawns", "N": "white_knights", "B": "white_bishops",
+    "R": "white_rooks", "Q": "white_queens", "K": "white_king",
+    "p": "black_pawns", "n": "black_knights", "b": "black_bishops",
+    "r": "black_rooks", "q": "black_queens", "k": "black_king",
+}
+
+# Ray directions as (row delta, col delta)
+NORTH, SOUTH, EAST, WEST = (-1, 0), (1, 0), (0, 1), (0, -1)
+NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST = (-1, 1), (-1, -1), (1, 1), (1, -1)
+
+ROOK_DIRECTIONS = (NORTH, SOUTH, EAST, WEST)
+BISHOP_DIRECTIONS = (NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST)
+
+
+@dataclass
+class BitBoard:
+    """Twelve piece bitboards plus the occupancy masks derived from them."""
+
+    white_pawns: int = 0
+    white_knights: int = 0
+    white_bishops: int = 0
+    white_rooks: int = 0
+    white_queens: int = 0
+    white_king: int = 0
+    black_pawns: int = 0
+    black_knights: int = 0
+    black_bishops: int = 0
+    black_rooks: int = 0
+    black_queens: int = 0
+    black_king: int = 0
+    occ_white: int = 0
+    occ_black: int = 0
+    occ_all: int = 0
+
+    def occ_same(self, color: str) -> int:
+        """Get the occupancy mask of the given color."""
+        return self.occ_white if color == "white" else self.occ_black
+
+    def occ_enemy(self, color: str) -> int:
+        """Get the occupancy mask of the opponent of the given color."""
+        return self.occ_black if color == "white" else self.occ_white
+
+    def toggle_move(self, from_sq: int, to_sq: int, moving: str, captured: str) -> None:
+        """Make a move in place with XORs; calling it again with the same arguments unmakes it."""
+        from_bit, to_bit = 1 << from_sq, 1 << to_sq
+        field = PIECE_FIELDS[moving]
+        setattr(self, field, getattr(self, field) ^ from_bit ^ to_bit)
+        if moving.isupper():
+            self.occ_white ^= from_bit ^ to_bit
+        else:
+            self.occ_black ^= from_bit ^ to_bit
+        if captured:
+            field = PIECE_FIELDS[captured]
+            setattr(self, field, getattr(self, field) ^ to_bit)
+            if captured.isupper():
+                self.occ_white ^= to_bit
+            else:
+                self.occ_black ^= to_bit
+        self.occ_all = self.occ_white | self.occ_black
+
+
+def board_from_list(board: Sequence[Sequence[str]]) -> BitBoard:
+    """Build a BitBoard from an 8x8 list board."""
+    masks = dict.fromkeys(PIECE_FIELDS, 0)
+    for sq, piece in enumerate(chain.from_iterable(board)):
+        if piece:
+            masks[piece] |= 1 << sq
+
+    occ_white = (masks["P"] | masks["N"] | masks["B"]
+                 | masks["R"] | masks["Q"] | masks["K"])
+    occ_black = (masks["p"] | masks["n"] | masks["b"]
+                 | masks["r"] | masks["q"] | masks["k"])
+    # PIECE_FIELDS lists the pieces in BitBoard field order
+    return BitBoard(
+        *masks.values(),
+        occ_white=occ_white,
+        occ_black=occ_black,
+        occ_all=occ_white | occ_black,
+    )
+
+
+def _build_zobrist() -> Dict[str, List[int]]:
+    """Build the random per-piece, per-square keys for Zobrist hashing."""
+    rng = random.Random(0x5EED)
+    return {piece: [rng.getrandbits(64) for _ in range(64)] for piece in PIECE_FIELDS}
+
+
+ZOBRIST = _build_zobrist()
+
+
+def zobrist_hash(board: Sequence[Sequence[str]]) -> int:
+    """Compute the Zobrist key of an 8x8 list board from scratch."""
+    key = 0
+    for sq, piece in enumerate(chain.from_iterable(board)):
+        if piece:
+            key ^= ZOBRIST[piece][sq]
+    return key
+
+
+def list_from_board(bb: BitBoard) -> List[List[str]]:
+    """Build an 8x8 list board from a BitBoard."""
+    cells = [""] * 64
+    for piece, field in PIECE_FIELDS.items():
+        mask = getattr(bb, field)
+        while mask:
+            low = mask & -mask
+            cells[low.bit_length() - 1] = piece
+            mask ^= low
+    return [cells[row * 8:row * 8 + 8] for row in range(8)]
+
+
+def lsb(mask: int) -> int:
+    """Get the index of the lowest set square of a non-empty mask."""
+    return (mask & -mask).bit_length() - 1
+
+
+def pop_lsb(mask: int) -> Tuple[int, int]:
+    """Split a non-empty mask into its lowest square index and the remaining mask."""
+    return (mask & -mask).bit_length() - 1, mask & (mask - 1)
+
+
+def mask_to_squares(mask: int) -> List[Tuple[int, int]]:
+    """Convert a square mask to a list of (row, col) tuples."""
+    squares = []
+    while mask:
+        sq = (mask & -mask).bit_length() - 1
+        squares.append((sq >> 3, sq & 7))
+        mask &= mask - 1
+    return squares
+
+
+def pawn_pushes(sq: int, color: str, occ: int) -> int:
+    """Get the single and double pushes of a pawn for the given occupancy."""
+    empty = ~occ
+    if color == "white":
+        single = (1 << sq >> 8) & empty
+        return single | ((single & ROW_5) >> 8) & empty
+    single = (1 << sq << 8) & empty & MASK_64
+    return single | ((single & ROW_2) << 8) & empty & MASK_64
+
+
+def pawn_attacks(sq: int, color: str) -> int:
+    """Get the squares a pawn attacks diagonally, edge files masked off."""
+    bit = 1 << sq
+    if color == "white":
+        return (bit >> 9) & ~FILE_H | (bit >> 7) & ~FILE_A
+    return ((bit << 7) & ~FILE_H | (bit << 9) & ~FILE_A) & MASK_64
+
+
+def _build_rays() -> dict:
+    """Build the per-square ray masks for every sliding direction."""
+    rays = {}
+    for dr, dc in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+        table = []
+        for sq in range(64):
+            row, col = divmod(sq, 8)
+            mask = 0
+            row, col = row + dr, col + dc
+            while 0 <= row < 8 and 0 <= col < 8:
+                mask |= 1 << (row * 8 + col)
+                row, col = row + dr, col + dc
+            table.append(mask)
+        rays[(dr, dc)] = table
+    return rays
+
+
+def _build_step_attacks(offsets: Tuple[Tuple[int, int], ...]) -> List[int]:
+    """Build the per-square attack masks for a non-sliding piece."""
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        for dr, dc in offsets:
+            new_row, new_col = row + dr, col + dc
+            if 0 <= new_row < 8 and 0 <= new_col < 8:
+                mask |= 1 << (new_row * 8 + new_col)
+        table.append(mask)
+    return table
+
+
+RAYS = _build_rays()
+ROOK_RAYS = [
+    RAYS[NORTH][sq] | RAYS[SOUTH][sq] | RAYS[EAST][sq] | RAYS[WEST][sq] for sq in range(64)
+]
+BISHOP_RAYS = [
+    RAYS[NORTH_EAST][sq] | RAYS[NORTH_WEST][sq] | RAYS[SOUTH_EAST][sq] | RAYS[SOUTH_WEST][sq]
+    for sq in range(64)
+]
+
+KNIGHT_ATTACKS = _build_step_attacks(
+    ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+)
+KING_ATTACKS = _build_step_attacks(ROOK_DIRECTIONS + BISHOP_DIRECTIONS)
+PAWN_ATTACKS = {
+    color: [pawn_attacks(sq, color) for sq in range(64)] for color in ("white", "black")
+}
+
+
+# Rays towards higher square numbers hit their lowest set bit first
+FORWARD_DIRECTIONS = frozenset(
+    direction for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+    if direction[0] * 8 + direction[1] > 0
+)
+
+
+def first_blocker(blockers: int, direction: Tuple[int, int]) -> int:
+    """Get the square of the blocker nearest the origin of a ray, given the ray's non-empty blockers."""
+    if direction in FORWARD_DIRECTIONS:
+        return (blockers & -blockers).bit_length() - 1
+    return blockers.bit_length() - 1
+
+
+def ray_attacks(sq: int, occ: int, directions: Tuple[Tuple[int, int], ...]) -> int:
+    """Get sliding attacks from a square with direct ray lookups, cut at the first blocker of each ray."""
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= RAYS[direction][first_blocker(blockers, direction)]
+        attacks |= ray
+    return attacks
+
+
+def _relevant_mask(sq: int, directions: Tuple[Tuple[int, int], ...]) -> int:
+    """Get the squares whose occupancy can change a slider's attacks (rays minus edges)."""
+    mask = 0
+    for direction in directions:
+        ray = RAYS[direction][sq]
+        if ray:
+            # Drop the last square of the ray, a piece there cannot block anything
+            if direction in FORWARD_DIRECTIONS:
+                ray &= ~(1 << (ray.bit_length() - 1))
+            else:
+                ray &= ray - 1
+        mask |= ray
+    return mask
+
+
+# Magic multipliers for the square numbering above, found by random search
+# with a fixed shift of 64 - popcount(mask).
+ROOK_MAGICS = (
+    0x2080001440022581, 0x1080200040001080, 0x4080100008200080, 0x0280080080100254,
+    0x4D8004000A180080, 0x0100080400020100, 0x1080010040800200, 0x0200004402002081,
+    0x0068800024884004, 0x1000804000802002, 0x000200208A001040, 0x3008801000800800,
+    0x2006001060440A00, 0x1000800200800400, 0x0004000441024810, 0xA001000082004100,
+    0x0040808000204014, 0x0000424002201000, 0x0010110041002000, 0x0000090021041000,
+    0x0204008004800800, 0x0000808004000200, 0x6006040021485042, 0x0000020002409924,
+    0x2000401980028020, 0x4000400100308100, 0x0000820200201041, 0xB100100080800800,
+    0x3004080080040080, 0x0802000200041009, 0x01A0580400021110, 0x00020042000408A1,
+    0x4218884000800023, 0x0480201000400045, 0x0010200080801000, 0x1200200901001000,
+    0x0000100801000500, 0x0080020080800400, 0x004A000100404080, 0x0480005402001081,
+    0x258000402000C000, 0xA010004820084002, 0x0480200010008080, 0x244100100021000C,
+    0x2040080005010010, 0x0012000810020004, 0x0011000200B9000C, 0x1121000080410002,
+    0x00082080410A0600, 0x4002008100402600, 0x0A0300E008544100, 0x7B00080010008080,
+    0x0300080100100500, 0x0002020080040080, 0x0042521810214400, 0x8A00004089140200,
+    0x00001280010A2041, 0x0400401102042086, 0x41902000100C4101, 0x0043020420900009,
+    0x00E2000410082002, 0x4402000108041002, 0x2100101A00814804, 0x0400010400218246,
+)
+BISHOP_MAGICS = (
+    0x0102040418220020, 0x0108024802002028, 0x8010044040400001, 0x0022209200044800,
+    0x4004504005040114, 0x0022010420A80800, 0x0008441008090002, 0x0000420801480200,
+    0x1100220244011C00, 0x00883004081AB020, 0x4400100152002000, 0x4019080841004000,
+    0x2861021210000000, 0x400EA10108400020, 0x4800208208A24000, 0x0020A500A0842085,
+    0x3410000802504400, 0x0010E0200C010060, 0x0014182042408200, 0x4094006840112109,
+    0x2014200202010000, 0x000100020080C400, 0x800400420D2C0200, 0x0002200182251000,
+    0x0010F10304C41000, 0x001024A008281084, 0x0088110002040100, 0x0820080001004008,
+    0x0104040020410050, 0x0110002027040500, 0x418C008009182100, 0x2C00A9040C80480B,
+    0x008110C8005020A4, 0x4004210802041000, 0x0004020108208100, 0x0000080800120A00,
+    0x430C008400820102, 0x1400808100020108, 0x005006020010A8A0, 0x000801868004A220,
+    0x00420105C00C2000, 0x1010921032019040, 0x0300222028103000, 0x0008004208001080,
+    0x5410202248811400, 0x0008010800800808, 0x3C02C20404000900, 0x0408022282040032,
+    0x0000941002100000, 0x0112209A10100804, 0x080C020111210000, 0x442002A442022008,
+    0x00084A181B040000, 0x00115021021C2080, 0x4010051000A20000, 0x0404688085060000,
+    0x0000220110011000, 0x140000220734200C, 0x0440010424020800, 0x2204828883460800,
+    0x0020000004050410, 0x4060004A20082080, 0x00489034B002C201, 0x0444049010410300,
+)
+
+
+def _build_magic_table(
+    directions: Tuple[Tuple[int, int], ...], magics: Tuple[int, ...]
+) -> Tuple[List[int], List[int], List[int], array]:
+    """Build masks, shifts, offsets and the flat attack table for one slider type."""
+    masks, shifts, offsets = [], [], []
+    table = array("Q")
+    for sq in range(64):
+        mask = _relevant_mask(sq, directions)
+        shift = 64 - bin(mask).count("1")
+        masks.append(mask)
+        shifts.append(shift)
+        offsets.append(len(table))
+
+        entries = [0] * (1 << (64 - shift))
+        # Enumerate every subset of the mask (Carry-Rippler)
+        occ = 0
+        while True:
+            index = ((occ * magics[sq]) & MASK_64) >> shift
+            attacks = ray_attacks(sq, occ, directions)
+            # A shared slot is only safe if both occupancies give the same attacks
+            if entries[index] and entries[index] != attacks:
+                raise ValueError(f"Magic number for square {sq} maps different attack sets to one slot")
+            entries[index] = attacks
+            occ = (occ - mask) & mask
+            if not occ:
+                break
+        table.extend(entries)
+    return masks, shifts, offsets, table
+
+
+ROOK_MASKS, ROOK_SHIFTS, ROOK_OFFSET, ROOK_TABLE = _build_magic_table(
+    ROOK_DIRECTIONS, ROOK_MAGICS
+)
+BISHOP_MASKS, BISHOP_SHIFTS, BISHOP_OFFSET, BISHOP_TABLE = _build_magic_table(
+    BISHOP_DIRECTIONS, BISHOP_MAGICS
+)
+
+
+def rook_attacks(sq: int, occ: int) -> int:
+    """Get rook attacks from a square for the given occupancy."""
+    index = (((occ & ROOK_MASKS[sq]) * ROOK_MAGICS[sq]) & MASK_64) >> ROOK_SHIFTS[sq]
+    return ROOK_TABLE[ROOK_OFFSET[sq] + index]
+
+
+def bishop_attacks(sq: int, occ: int) -> int:
+    """Get bishop attacks from a square for the given occupancy."""
+    index = (((occ & BISHOP_MASKS[sq]) * BISHOP_MAGICS[sq]) & MASK_64) >> BISHOP_SHIFTS[sq]
+    return BISHOP_TABLE[BISHOP_OFFSET[sq] + index]
+
+
+def queen_attacks(sq: int, occ: int) -> int:
+    """Get queen attacks from a square for the given occupancy."""
+    return rook_attacks(sq, occ) | bishop_attacks(sq, occ)
+
+
+def attackers_to(bb: BitBoard, sq: int, by_color: str) -> int:
+    """Get the mask of the pieces of the given color that attack a square."""
+    occ = bb.occ_all
+    if by_color == "white":
+        # A white pawn attacks sq exactly when a black pawn on sq would attack it
+        pawns = PAWN_ATTACKS["black"][sq] & bb.white_pawns
+        knights, king = bb.white_knights, bb.white_king
+        diagonal = bb.white_bishops | bb.white_queens
+        straight = bb.white_rooks | bb.white_queens
+    else:
+        pawns = PAWN_ATTACKS["white"][sq] & bb.black_pawns
+        knights, king = bb.black_knights, bb.black_king
+        diagonal = bb.black_bishops | bb.black_queens
+        straight = bb.black_rooks | bb.black_queens
+    return (
+        pawns
+        | (KNIGHT_ATTACKS[sq] & knights)
+        | (KING_ATTACKS[sq] & king)
+        | (bishop_attacks(sq, occ) & diagonal)
+        | (rook_attacks(sq, occ) & straight)
+    )
+
+
+def is_attacked(bb: BitBoard, sq: int, by_color: str) -> bool:
+    """Check if a square is attacked by any piece of the given color, cheapest attacker types first."""
+    if by_color == "white":
+        if (PAWN_ATTACKS["black"][sq] & bb.white_pawns
+                or KNIGHT_ATTACKS[sq] & bb.white_knights
+                or KING_ATTACKS[sq] & bb.white_king):
+            return True
+        diagonal = bb.white_bishops | bb.white_queens
+        straight = bb.white_rooks | bb.white_queens
+    else:
+        if (PAWN_ATTACKS["white"][sq] & bb.black_pawns
+                or KNIGHT_ATTACKS[sq] & bb.black_knights
+                or KING_ATTACKS[sq] & bb.black_king):
+            return True
+        diagonal = bb.black_bishops | bb.black_queens
+        straight = bb.black_rooks | bb.black_queens
+    # Sliders need a magic lookup, so skip them when none can reach the square at all
+    occ = bb.occ_all
+    if diagonal & BISHOP_RAYS[sq] and bishop_attacks(sq, occ) & diagonal:
+        return True
+    return bool(straight & ROOK_RAYS[sq] and rook_attacks(sq, occ) & straight)
+
+
+def pins_and_checkers(bb: BitBoard, color: str) -> Tuple[Dict[int, int], int]:
+    """Find the pinned pieces of a color with the ray each may still move along, and the checking pieces."""
+    if color == "white":
+        king, own = bb.white_king, bb.occ_white
+        diagonal = bb.black_bishops | bb.black_queens
+        straight = bb.black_rooks | bb.black_queens
+        enemy_color = "black"
+    else:
+        king, own = bb.black_king, bb.occ_black
+        diagonal = bb.white_bishops | bb.white_queens
+        straight = bb.white_rooks | bb.white_queens
+        enemy_color = "white"
+    if not king:
+        return {}, 0
+
+    king_sq = lsb(king)
+    pins = {}
+    for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+        sliders = straight if direction in ROOK_DIRECTIONS else diagonal
+        ray = RAYS[direction][king_sq]
+        if not ray & sliders:
+            continue
+        blockers = ray & bb.occ_all
+        first = first_blocker(blockers, direction)
+        if not own >> first & 1:
+            continue
+        blockers ^= 1 << first
+        if not blockers:
+            continue
+        second = first_blocker(blockers, direction)
+        if sliders >> second & 1:
+            # The pinned piece may move between the king and the pinner, or capture it
+            pins[first] = ray & ~RAYS[direction][second]
+    return pins, attackers_to(bb, king_sq, enemy_color)
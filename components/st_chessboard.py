@@ -1,10 +1,34 @@
+import re
 import streamlit as st
 import streamlit.components.v1 as components
-from typing import Optional, List, Dict, Any, Tuple
-import copy
-
-
-DEFAULT_BOARD = [
+from typing import Optional, List, Dict, Any, Tuple, Callable
+from functools import lru_cache
+
+from .bitboard import (
+    BitBoard,
+    KING_ATTACKS,
+    KNIGHT_ATTACKS,
+    MASK_64,
+    PAWN_ATTACKS,
+    PIECE_FIELDS,
+    ZOBRIST,
+    bishop_attacks,
+    board_from_list,
+    is_attacked,
+    lsb,
+    mask_to_squares,
+    pawn_pushes,
+    pins_and_checkers,
+    pop_lsb,
+    queen_attacks,
+    rook_attacks,
+    zobrist_hash,
+)
+
+
+Board = Tuple[Tuple[str, ...], ...]
+
+DEFAULT_BOARD: Board = tuple(tuple(row) for row in [
     ["r", "n", "b", "q", "k", "b", "n", "r"],
     ["p", "p", "p", "p", "p", "p", "p", "p"],
     ["", "", "", "", "", "", "", ""],
@@ -13,12 +37,68 @@ DEFAULT_BOARD = [
     ["", "", "", "", "", "", "", ""],
     ["P", "P", "P", "P", "P", "P", "P", "P"],
     ["R", "N", "B", "Q", "K", "B", "N", "R"],
-]
+])
+DEFAULT_ZOBRIST_KEY = zobrist_hash(DEFAULT_BOARD)
+
+# Move and legality results keyed by Zobrist key; stale positions simply never match again
+ZOBRIST_CACHE_SIZE = 65536
+POSSIBLE_MOVES_CACHE: Dict[Tuple, int] = {}
+LEGAL_MOVES_CACHE: Dict[Tuple, int] = {}
+IN_CHECK_CACHE: Dict[Tuple[int, str], bool] = {}
+GAME_STATUS_CACHE: Dict[Tuple, str] = {}
+
+# Zobrist keys of immutable boards by object identity; each entry keeps its board alive so the id stays unique
+BOARD_KEYS_SIZE = 4096
+BOARD_KEYS: Dict[int, Tuple[Board, int]] = {id(DEFAULT_BOARD): (DEFAULT_BOARD, DEFAULT_ZOBRIST_KEY)}
 
 PIECE_SYMBOLS = {
     "K": "♔", "Q": "♕", "R": "♖", "B": "♗", "N": "♘", "P": "♙",
     "k": "♚", "q": "♛", "r": "♜", "b": "♝", "n": "♞", "p": "♟", "": "",
 }
+PIECE_SYMBOL_TABLE = str.maketrans({piece: symbol for piece, symbol in PIECE_SYMBOLS.items() if piece})
+
+SQUARES = tuple((row, col) for row in range(8) for col in range(8))
+COORD_TO_RC = {f"{chr(97 + col)}{8 - row}": (row, col) for row, col in SQUARES}
+RC_TO_COORD = {position: coordinate for coordinate, position in COORD_TO_RC.items()}
+COORDINATE_RE = re.compile(r"[a-h][1-8]", re.IGNORECASE)
+
+SQUARE_PARITY = tuple(
+    "light" if (row + col) % 2 == 0 else "dark" for row in range(8) for col in range(8)
+)
+
+SQUARE_HIGHLIGHTS = {
+    "selected": "#ffff99",
+    "destination": "#87ceeb",
+}
+
+# Material value of each piece, used for the captured pieces display
+PIECE_VALUES = {
+    "P": 1, "N": 3, "B": 3, "R": 5, "Q": 9, "K": 0,  # King (shouldn't be captured, but just in case)
+    "p": 1, "n": 3, "b": 3, "r": 5, "q": 9, "k": 0,
+}
+
+# Integer piece codes: 1-6 white, 9-14 black (bit 3 is the color), 0 empty
+PIECE_CODE = {
+    "P": 1, "N": 2, "B": 3, "R": 4, "Q": 5, "K": 6,
+    "p": 9, "n": 10, "b": 11, "r": 12, "q": 13, "k": 14, "": 0,
+}
+PIECE_COLORS = ("white", "black")  # Indexed by the color bit, code >> 3
+MOBILITY_ORDER = {
+    "white": ("Q", "R", "N", "B", "P", "K"),
+    "black": ("q", "r", "n", "b", "p", "k"),
+}
+
+
+def _castling_sides(row: int) -> Tuple[Tuple[str, int, int, Tuple[int, ...], int], ...]:
+    """Build (side, rook square, between mask, king path, king destination) for a back rank."""
+    base = row * 8
+    return (
+        ("kingside", base + 7, 0b11 << (base + 5), (base + 5, base + 6), base + 6),
+        ("queenside", base, 0b111 << (base + 1), (base + 2, base + 3), base + 2),
+    )
+
+
+CASTLING_SIDES = {"white": _castling_sides(7), "black": _castling_sides(0)}
 
 BOARD_THEMES = {
     "Default": {
@@ -57,23 +137,36 @@ def coordinate_to_position(coordinate: str) -> tuple[int, int]:
     if len(coordinate) != 2:
         raise ValueError("Coordinate must be 2 characters (e.g., 'a1')")
     
-    col = ord(coordinate[0].lower()) - ord("a")
-    row = 8 - int(coordinate[1])
-    
-    if not (0 <= col < 8 and 0 <= row < 8):
+    position = COORD_TO_RC.get(coordinate.lower())
+    if position is None:
         raise ValueError("Invalid coordinate")
     
-    return row, col
+    return position
 
 
 def position_to_coordinate(row: int, col: int) -> str:
     """Convert (row, col) indices to chess coordinate."""
-    return f"{chr(97 + col)}{8 - row}"
+    return RC_TO_COORD[(row, col)]
+
+
+def square_to_position(square: int) -> Tuple[int, int]:
+    """Convert a square index (row * 8 + col) to (row, col) indices."""
+    return square >> 3, square & 7
+
+
+def square_to_coordinate(square: int) -> str:
+    """Convert a square index (row * 8 + col) to chess coordinate."""
+    return position_to_coordinate(square >> 3, square & 7)
+
+
+def mask_to_coordinates(mask: int) -> List[str]:
+    """Convert a square mask to chess coordinates in square order."""
+    return [RC_TO_COORD[square] for square in mask_to_squares(mask)]
 
 
 def validate_coordinate(coordinate: str) -> tuple[bool, str]:
     """Validate a chess coordinate and return (is_valid, error_message)."""
-    if not coordinate:
+    if not coordinate or COORDINATE_RE.fullmatch(coordinate):
         return True, ""
     
     if len(coordinate) != 2:
@@ -133,8 +226,8 @@ def validate_move(from_coord: str, to_coord: str) -> tuple[bool, str]:
         from_row, from_col = coordinate_to_position(from_coord)
         to_row, to_col = coordinate_to_position(to_coord)
         
-        legal_moves = get_legal_moves(st.session_state.chess_board, from_row, from_col)
-        if (to_row, to_col) in legal_moves:
+        legal_moves = get_legal_moves_mask(st.session_state.chess_board, from_row, from_col)
+        if legal_moves >> (to_row * 8 + to_col) & 1:
             return True, ""
         else:
             piece = st.session_state.chess_board[from_row][from_col]
@@ -149,16 +242,16 @@ def validate_move(from_coord: str, to_coord: str) -> tuple[bool, str]:
 def initialize_game_state():
     """Initialize the chess game state in session state."""
     if "chess_board" not in st.session_state:
-        st.session_state.chess_board = copy.deepcopy(DEFAULT_BOARD)
+        st.session_state.chess_board = DEFAULT_BOARD
 
     if "current_player" not in st.session_state:
         st.session_state.current_player = "white"
 
     if "selected_square" not in st.session_state:
-        st.session_state.selected_square = None
+        st.session_state.selected_square = None  # Square index (row * 8 + col)
 
-    if "possible_moves" not in st.session_state:
-        st.session_state.possible_moves = []
+    if "possible_moves_bb" not in st.session_state:
+        st.session_state.possible_moves_bb = 0  # Bit row * 8 + col set per destination
 
     if "move_history" not in st.session_state:
         st.session_state.move_history = []
@@ -178,7 +271,7 @@ def initialize_game_state():
             "white": {"kingside": False, "queenside": False},
             "black": {"kingside": False, "queenside": False}
         }
-    
+
     if "captured_pieces" not in st.session_state:
         st.session_state.captured_pieces = {
             "white": [],
@@ -188,10 +281,10 @@ def initialize_game_state():
 
 def reset_game():
     """Reset the chess game to initial state."""
-    st.session_state.chess_board = copy.deepcopy(DEFAULT_BOARD)
+    st.session_state.chess_board = DEFAULT_BOARD
     st.session_state.current_player = "white"
     st.session_state.selected_square = None
-    st.session_state.possible_moves = []
+    st.session_state.possible_moves_bb = 0
     st.session_state.move_history = []
     st.session_state.game_status = get_game_status(st.session_state.chess_board, "white")
     st.session_state.last_move = None
@@ -208,98 +301,107 @@ def reset_game():
 
 def is_white_piece(piece: str) -> bool:
     """Check if a piece is white (uppercase)."""
-    return piece.isupper() and piece != ""
+    return 0 < PIECE_CODE[piece] < 8
 
 
 def is_black_piece(piece: str) -> bool:
     """Check if a piece is black (lowercase)."""
-    return piece.islower() and piece != ""
+    return PIECE_CODE[piece] > 8
+
+
+def piece_color(piece: str) -> str:
+    """Get the color of a non-empty piece from its code's color bit."""
+    return PIECE_COLORS[PIECE_CODE[piece] >> 3]
 
 
 def is_same_color(piece1: str, piece2: str) -> bool:
     """Check if two pieces are the same color."""
-    if not piece1 or not piece2:
-        return False
-    return (is_white_piece(piece1) and is_white_piece(piece2)) or (
-        is_black_piece(piece1) and is_black_piece(piece2)
+    code1, code2 = PIECE_CODE[piece1], PIECE_CODE[piece2]
+    # Bit 3 holds the color, so equal colors XOR to zero there
+    return bool(code1 and code2 and not (code1 ^ code2) & 8)
+
+
+def get_basic_king_moves(
+    board: Board, row: int, col: int, bb: Optional[BitBoard] = None
+) -> int:
+    """Get the destination mask of basic king moves (one square in any direction) without castling."""
+    if bb is None:
+        bb = board_from_list(board)
+    color = piece_color(board[row][col])
+    return KING_ATTACKS[row * 8 + col] & ~bb.occ_same(color)
+
+
+def get_possible_moves_mask(
+    board: Board, row: int, col: int, include_castling: bool = True
+) -> int:
+    """Get the destination mask of a piece's possible moves, memoized per position."""
+    if board[row][col] == "":
+        return 0
+    special_state = get_special_move_state(board[row][col], include_castling)
+    cache_key = (position_key(board), row, col, include_castling, special_state)
+    return _memo(
+        POSSIBLE_MOVES_CACHE,
+        cache_key,
+        lambda: generate_possible_moves(board, row, col, include_castling),
     )
 
 
-def get_basic_king_moves(board: List[List[str]], row: int, col: int) -> List[Tuple[int, int]]:
-    """Get basic king moves (one square in any direction) without castling."""
-    moves = []
-    piece = board[row][col]
-
-    # King moves one square in any direction
-    directions = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-
-    for dr, dc in directions:
-        new_row, new_col = row + dr, col + dc
-        if 0 <= new_row < 8 and 0 <= new_col < 8:
-            target_piece = board[new_row][new_col]
-            if target_piece == "" or not is_same_color(piece, target_piece):
-                moves.append((new_row, new_col))
-
-    return moves
-
-
-def get_possible_moves(
-    board: List[List[str]], row: int, col: int, include_castling: bool = True
-) -> List[Tuple[int, int]]:
-    """Get all possible moves for a piece at the given position."""
-    piece = board[row][col].lower()
-    moves = []
-
-    if piece == "p":  # Pawn
-        moves = get_pawn_moves(board, row, col)
-    elif piece == "r":  # Rook
-        moves = get_rook_moves(board, row, col)
-    elif piece == "n":  # Knight
-        moves = get_knight_moves(board, row, col)
-    elif piece == "b":  # Bishop
-        moves = get_bishop_moves(board, row, col)
-    elif piece == "q":  # Queen
-        moves = get_queen_moves(board, row, col)
-    elif piece == "k":  # King
-        if include_castling:
-            moves = get_king_moves(board, row, col)
-        else:
-            moves = get_basic_king_moves(board, row, col)
-
-    return moves
+def get_special_move_state(piece: str, include_castling: bool) -> Optional[Tuple]:
+    """Get the session state that can change the moves of a piece (en passant and castling rights)."""
+    piece_lower = piece.lower()
+    if piece_lower == "p":
+        last_move = st.session_state.last_move
+        return tuple(last_move.values()) if last_move else None
+    if piece_lower == "k" and include_castling:
+        color = piece_color(piece)
+        rook_moved = st.session_state.rook_moved.get(color, {})
+        return (
+            st.session_state.king_moved.get(color, False),
+            rook_moved.get("kingside", False),
+            rook_moved.get("queenside", False),
+        )
+    return None
 
 
-def get_pawn_moves(board: List[List[str]], row: int, col: int) -> List[Tuple[int, int]]:
-    """Get possible moves for a pawn, including en passant."""
-    moves = []
+def generate_possible_moves(
+    board: Board,
+    row: int,
+    col: int,
+    include_castling: bool = True,
+    bb: Optional[BitBoard] = None,
+) -> int:
+    """Generate the destination mask of all possible moves for a piece at the given position."""
+    piece_type = PIECE_CODE[board[row][col]] & 7
+    if not piece_type:
+        return 0
+    if bb is None:
+        bb = board_from_list(board)
+
+    if piece_type == 6 and not include_castling:  # King
+        return get_basic_king_moves(board, row, col, bb)
+    return MOVE_FNS[piece_type](board, row, col, bb)
+
+
+def get_pawn_moves(
+    board: Board, row: int, col: int, bb: Optional[BitBoard] = None
+) -> int:
+    """Get the destination mask of possible moves for a pawn, including en passant."""
+    if bb is None:
+        bb = board_from_list(board)
     piece = board[row][col]
     is_white = is_white_piece(piece)
+    color = "white" if is_white else "black"
+    sq = row * 8 + col
 
     # Direction: white pawns move up (row decreases), black pawns move down (row increases)
     direction = -1 if is_white else 1
-    # White pawns start at row 6 (rank 2), black pawns start at row 1 (rank 7)
-    start_row = 6 if is_white else 1
-
-    # Forward move
-    new_row = row + direction
-    if 0 <= new_row < 8 and board[new_row][col] == "":
-        moves.append((new_row, col))
-
-        # Double move from starting position
-        if row == start_row and 0 <= new_row + direction < 8 and board[new_row + direction][col] == "":
-            moves.append((new_row + direction, col))
-
-    # Diagonal captures
-    for dc in [-1, 1]:
-        new_row, new_col = row + direction, col + dc
-        if 0 <= new_row < 8 and 0 <= new_col < 8:
-            target_piece = board[new_row][new_col]
-            if target_piece != "" and not is_same_color(piece, target_piece):
-                moves.append((new_row, new_col))
+
+    # Forward moves (double move from the starting row) and diagonal captures
+    moves = pawn_pushes(sq, color, bb.occ_all) | (PAWN_ATTACKS[color][sq] & bb.occ_enemy(color))
 
     # En passant capture
-    if hasattr(st.session_state, 'last_move') and st.session_state.last_move:
-        last_move = st.session_state.last_move
+    last_move = st.session_state.last_move
+    if last_move:
         # Check if last move was a pawn moving two squares
         if (last_move['piece'].lower() == 'p' and 
             abs(last_move['to_row'] - last_move['from_row']) == 2):
@@ -317,159 +419,101 @@ def get_pawn_moves(board: List[List[str]], row: int, col: int) -> List[Tuple[int
                     capture_col = last_move['to_col']
                     
                     if 0 <= capture_row < 8:
-                        moves.append((capture_row, capture_col))
+                        moves |= 1 << (capture_row * 8 + capture_col)
 
     return moves
 
 
-def get_rook_moves(board: List[List[str]], row: int, col: int) -> List[Tuple[int, int]]:
-    """Get possible moves for a rook."""
-    moves = []
-    piece = board[row][col]
-
-    # Horizontal and vertical directions
-    directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-    for dr, dc in directions:
-        for i in range(1, 8):
-            new_row, new_col = row + dr * i, col + dc * i
-            if not (0 <= new_row < 8 and 0 <= new_col < 8):
-                break
-
-            target_piece = board[new_row][new_col]
-            if target_piece == "":
-                moves.append((new_row, new_col))
-            elif not is_same_color(piece, target_piece):
-                moves.append((new_row, new_col))
-                break
-            else:
-                break
-
-    return moves
+def get_rook_moves(
+    board: Board, row: int, col: int, bb: Optional[BitBoard] = None
+) -> int:
+    """Get the destination mask of possible moves for a rook."""
+    if bb is None:
+        bb = board_from_list(board)
+    color = piece_color(board[row][col])
+    return rook_attacks(row * 8 + col, bb.occ_all) & ~bb.occ_same(color)
 
 
 def get_knight_moves(
-    board: List[List[str]], row: int, col: int
-) -> List[Tuple[int, int]]:
-    """Get possible moves for a knight."""
-    moves = []
-    piece = board[row][col]
-
-    # Knight moves in L-shape
-    knight_moves = [
-        (-2, -1),
-        (-2, 1),
-        (-1, -2),
-        (-1, 2),
-        (1, -2),
-        (1, 2),
-        (2, -1),
-        (2, 1),
-    ]
-
-    for dr, dc in knight_moves:
-        new_row, new_col = row + dr, col + dc
-        if 0 <= new_row < 8 and 0 <= new_col < 8:
-            target_piece = board[new_row][new_col]
-            if target_piece == "" or not is_same_color(piece, target_piece):
-                moves.append((new_row, new_col))
-
-    return moves
+    board: Board, row: int, col: int, bb: Optional[BitBoard] = None
+) -> int:
+    """Get the destination mask of possible moves for a knight."""
+    if bb is None:
+        bb = board_from_list(board)
+    color = piece_color(board[row][col])
+    return KNIGHT_ATTACKS[row * 8 + col] & ~bb.occ_same(color)
 
 
 def get_bishop_moves(
-    board: List[List[str]], row: int, col: int
-) -> List[Tuple[int, int]]:
-    """Get possible moves for a bishop."""
-    moves = []
-    piece = board[row][col]
-
-    # Diagonal directions
-    directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-
-    for dr, dc in directions:
-        for i in range(1, 8):
-            new_row, new_col = row + dr * i, col + dc * i
-            if not (0 <= new_row < 8 and 0 <= new_col < 8):
-                break
-
-            target_piece = board[new_row][new_col]
-            if target_piece == "":
-                moves.append((new_row, new_col))
-            elif not is_same_color(piece, target_piece):
-                moves.append((new_row, new_col))
-                break
-            else:
-                break
-
-    return moves
+    board: Board, row: int, col: int, bb: Optional[BitBoard] = None
+) -> int:
+    """Get the destination mask of possible moves for a bishop."""
+    if bb is None:
+        bb = board_from_list(board)
+    color = piece_color(board[row][col])
+    return bishop_attacks(row * 8 + col, bb.occ_all) & ~bb.occ_same(color)
 
 
 def get_queen_moves(
-    board: List[List[str]], row: int, col: int
-) -> List[Tuple[int, int]]:
-    """Get possible moves for a queen (combination of rook and bishop)."""
-    return get_rook_moves(board, row, col) + get_bishop_moves(board, row, col)
-
-
-def get_king_moves(board: List[List[str]], row: int, col: int) -> List[Tuple[int, int]]:
-    """Get possible moves for a king, including castling."""
-    moves = []
+    board: Board, row: int, col: int, bb: Optional[BitBoard] = None
+) -> int:
+    """Get the destination mask of possible moves for a queen (combination of rook and bishop)."""
+    if bb is None:
+        bb = board_from_list(board)
+    color = piece_color(board[row][col])
+    return queen_attacks(row * 8 + col, bb.occ_all) & ~bb.occ_same(color)
+
+
+def get_king_moves(
+    board: Board, row: int, col: int, bb: Optional[BitBoard] = None
+) -> int:
+    """Get the destination mask of possible moves for a king, including castling."""
+    if bb is None:
+        bb = board_from_list(board)
     piece = board[row][col]
     is_white = is_white_piece(piece)
     color = "white" if is_white else "black"
 
     # King moves one square in any direction
-    directions = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-
-    for dr, dc in directions:
-        new_row, new_col = row + dr, col + dc
-        if 0 <= new_row < 8 and 0 <= new_col < 8:
-            target_piece = board[new_row][new_col]
-            if target_piece == "" or not is_same_color(piece, target_piece):
-                moves.append((new_row, new_col))
+    moves = get_basic_king_moves(board, row, col, bb)
 
     # Castling logic
-    if (hasattr(st.session_state, 'king_moved') and 
-        hasattr(st.session_state, 'rook_moved') and
-        not st.session_state.king_moved.get(color, False)):
+    if not st.session_state.king_moved.get(color, False):
         
         # King must be on starting square
         starting_row = 7 if is_white else 0
+        own_rook = "R" if is_white else "r"
         if row == starting_row and col == 4:  # King on e1 or e8
             
             # Check if king is in check (can't castle out of check)
             if not is_in_check(board, color):
-                
-                # Kingside castling (short castling)
-                if not st.session_state.rook_moved.get(color, {}).get("kingside", False):
-                    # Check if rook is on h1/h8
-                    if board[starting_row][7].lower() == 'r' and is_same_color(piece, board[starting_row][7]):
-                        # Check if squares between king and rook are empty
-                        if board[starting_row][5] == "" and board[starting_row][6] == "":
-                            # Check if king passes through check
-                            if (not is_square_attacked(board, starting_row, 5, "black" if is_white else "white") and
-                                not is_square_attacked(board, starting_row, 6, "black" if is_white else "white")):
-                                moves.append((starting_row, 6))  # King moves to g1/g8
-                
-                # Queenside castling (long castling)
-                if not st.session_state.rook_moved.get(color, {}).get("queenside", False):
-                    # Check if rook is on a1/a8
-                    if board[starting_row][0].lower() == 'r' and is_same_color(piece, board[starting_row][0]):
-                        # Check if squares between king and rook are empty
-                        if (board[starting_row][1] == "" and 
-                            board[starting_row][2] == "" and 
-                            board[starting_row][3] == ""):
-                            # Check if king passes through check
-                            if (not is_square_attacked(board, starting_row, 2, "black" if is_white else "white") and
-                                not is_square_attacked(board, starting_row, 3, "black" if is_white else "white")):
-                                moves.append((starting_row, 2))  # King moves to c1/c8
+                rook_moved = st.session_state.rook_moved.get(color, {})
+                enemy_color = "black" if is_white else "white"
+                for side, rook_sq, between, path, king_to in CASTLING_SIDES[color]:
+                    # Rook unmoved and home, squares between empty, king never crosses an attacked square
+                    if (not rook_moved.get(side, False) and
+                        board[rook_sq >> 3][rook_sq & 7] == own_rook and
+                        not bb.occ_all & between and
+                        not any(is_attacked(bb, sq, enemy_color) for sq in path)):
+                        moves |= 1 << king_to
 
     return moves
 
 
+# Move generators indexed by piece type, PIECE_CODE[piece] & 7
+MOVE_FNS = [
+    None,
+    get_pawn_moves,
+    get_knight_moves,
+    get_bishop_moves,
+    get_rook_moves,
+    get_queen_moves,
+    get_king_moves,
+]
+
+
 def is_valid_move(
-    board: List[List[str]], from_row: int, from_col: int, to_row: int, to_col: int
+    board: Board, from_row: int, from_col: int, to_row: int, to_col: int
 ) -> bool:
     """Check if a move is valid."""
     if not (
@@ -481,46 +525,82 @@ def is_valid_move(
     if piece == "":
         return False
 
-    possible_moves = get_possible_moves(board, from_row, from_col)
-    return (to_row, to_col) in possible_moves
+    possible_moves = get_possible_moves_mask(board, from_row, from_col)
+    return bool(possible_moves & (1 << (to_row * 8 + to_col)))
+
+
+def _memo(cache: Dict[Tuple, Any], key: Tuple, compute: Callable[[], Any]) -> Any:
+    """Get a value from one of the Zobrist-keyed caches, computing it on a miss."""
+    value = cache.get(key)
+    if value is None:
+        if len(cache) >= ZOBRIST_CACHE_SIZE:
+            cache.clear()
+        value = cache[key] = compute()
+    return value
+
+
+def position_key(board: Board) -> int:
+    """Get the Zobrist key of a board, hashing each immutable board object only once."""
+    entry = BOARD_KEYS.get(id(board))
+    if entry is not None and entry[0] is board:
+        return entry[1]
+    key = zobrist_hash(board)
+    # List boards can change in place, so only tuple boards are remembered
+    if isinstance(board, tuple) and isinstance(board[0], tuple):
+        remember_board_key(board, key)
+    return key
+
+
+def remember_board_key(board: Board, key: int) -> None:
+    """Record the Zobrist key of an immutable board for position_key."""
+    if len(BOARD_KEYS) >= BOARD_KEYS_SIZE:
+        BOARD_KEYS.clear()
+    BOARD_KEYS[id(board)] = (board, key)
+
+
+def replace_squares(board: Board, changes: Dict[Tuple[int, int], str]) -> Board:
+    """Return a copy of the board with the given squares replaced, sharing untouched rows."""
+    rows = list(map(tuple, board))
+    for (row, col), piece in changes.items():
+        cells = rows[row]
+        rows[row] = cells[:col] + (piece,) + cells[col + 1:]
+    return tuple(rows)
 
 
 def make_move(
-    board: List[List[str]], from_row: int, from_col: int, to_row: int, to_col: int
-) -> List[List[str]]:
+    board: Board, from_row: int, from_col: int, to_row: int, to_col: int
+) -> Board:
     """Make a move on the board and return the new board state. Handles special moves."""
-    new_board = copy.deepcopy(board)
-    piece = new_board[from_row][from_col]
+    piece = board[from_row][from_col]
     piece_lower = piece.lower()
     is_white = is_white_piece(piece)
     color = "white" if is_white else "black"
     
     # Check for captures before making the move
-    captured_piece = new_board[to_row][to_col]
+    captured_piece = board[to_row][to_col]
     
     # Check for en passant before making the standard move
     is_en_passant = False
     en_passant_captured_piece = None
-    if piece_lower == 'p' and abs(to_col - from_col) == 1 and new_board[to_row][to_col] == "":
+    if piece_lower == 'p' and abs(to_col - from_col) == 1 and board[to_row][to_col] == "":
         # This is a diagonal pawn move to an empty square - check if it's en passant
-        if (hasattr(st.session_state, 'last_move') and 
-            st.session_state.last_move and
-            st.session_state.last_move['piece'].lower() == 'p' and
-            abs(st.session_state.last_move['to_row'] - st.session_state.last_move['from_row']) == 2 and
-            st.session_state.last_move['to_col'] == to_col and
-            st.session_state.last_move['to_row'] == from_row):
+        last_move = st.session_state.last_move
+        if (last_move and
+            last_move['piece'].lower() == 'p' and
+            abs(last_move['to_row'] - last_move['from_row']) == 2 and
+            last_move['to_col'] == to_col and
+            last_move['to_row'] == from_row):
             is_en_passant = True
-            en_passant_captured_piece = new_board[from_row][to_col]
+            en_passant_captured_piece = board[from_row][to_col]
     
     # Standard move
-    new_board[to_row][to_col] = piece
-    new_board[from_row][from_col] = ""
+    changes = {(from_row, from_col): "", (to_row, to_col): piece}
     
     # Handle special moves
     
     # En passant capture - remove the captured pawn
     if is_en_passant:
-        new_board[from_row][to_col] = ""
+        changes[(from_row, to_col)] = ""
     
     # Castling
     if piece_lower == 'k' and abs(to_col - from_col) == 2:
@@ -535,110 +615,82 @@ def make_move(
             rook_to_col = 3
         
         # Move the rook
-        rook = new_board[from_row][rook_from_col]
-        new_board[from_row][rook_to_col] = rook
-        new_board[from_row][rook_from_col] = ""
+        changes[(from_row, rook_to_col)] = board[from_row][rook_from_col]
+        changes[(from_row, rook_from_col)] = ""
+    
+    new_board = replace_squares(board, changes)
+    
+    # Update the Zobrist key incrementally from the changed squares
+    key = position_key(board)
+    for (row, col), new_piece in changes.items():
+        sq = row * 8 + col
+        old_piece = board[row][col]
+        if old_piece:
+            key ^= ZOBRIST[old_piece][sq]
+        if new_piece:
+            key ^= ZOBRIST[new_piece][sq]
+    remember_board_key(new_board, key)
     
     # Track captured pieces
-    if hasattr(st.session_state, 'captured_pieces'):
-        if captured_piece != "":
-            # Regular capture
-            st.session_state.captured_pieces[color].append(captured_piece)
-        elif is_en_passant and en_passant_captured_piece:
-            # En passant capture
-            st.session_state.captured_pieces[color].append(en_passant_captured_piece)
+    if captured_piece != "":
+        # Regular capture
+        st.session_state.captured_pieces[color].append(captured_piece)
+    elif is_en_passant and en_passant_captured_piece:
+        # En passant capture
+        st.session_state.captured_pieces[color].append(en_passant_captured_piece)
     
     # Track piece movements for castling rights
-    if hasattr(st.session_state, 'king_moved') and hasattr(st.session_state, 'rook_moved'):
-        # Track king movement
-        if piece_lower == 'k':
-            st.session_state.king_moved[color] = True
-        
-        # Track rook movement
-        if piece_lower == 'r':
-            # Determine which rook moved
-            if from_col == 0:  # Queenside rook
-                st.session_state.rook_moved[color]["queenside"] = True
-            elif from_col == 7:  # Kingside rook
-                st.session_state.rook_moved[color]["kingside"] = True
+    if piece_lower == 'k':
+        st.session_state.king_moved[color] = True
+    
+    # Track rook movement
+    if piece_lower == 'r':
+        # Determine which rook moved
+        if from_col == 0:  # Queenside rook
+            st.session_state.rook_moved[color]["queenside"] = True
+        elif from_col == 7:  # Kingside rook
+            st.session_state.rook_moved[color]["kingside"] = True
     
     # Store last move for en passant
-    if hasattr(st.session_state, 'last_move'):
-        st.session_state.last_move = {
-            'piece': piece,
-            'from_row': from_row,
-            'from_col': from_col,
-            'to_row': to_row,
-            'to_col': to_col
-        }
+    st.session_state.last_move = {
+        'piece': piece,
+        'from_row': from_row,
+        'from_col': from_col,
+        'to_row': to_row,
+        'to_col': to_col
+    }
     
     return new_board
 
 
-def get_square_color(board_theme: str, square_class: str) -> str:
-    """Get the color of a square based on the board theme."""
-    return BOARD_THEMES[board_theme][square_class]
-
-
-def populate_square_html(
-    piece: str,
-    board_theme: str,
-    row_idx: int,
-    col_idx: int,
-    key: str,
-    size: int = 400,
-) -> str:
-    """Populate the HTML for a square."""
-    selected_square = st.session_state.selected_square
-    possible_moves = st.session_state.possible_moves
-
-    piece_symbol = PIECE_SYMBOLS.get(piece, piece)
-    square_class = "light" if (row_idx + col_idx) % 2 == 0 else "dark"
-    square_id = f"square-{key}-{row_idx}-{col_idx}"
-
-    base_color = (
-        get_square_color(board_theme, "light")
-        if square_class == "light"
-        else get_square_color(board_theme, "dark")
-    )
-    square_color = base_color
+def parse_destination_square(to_coord: Optional[str]) -> Optional[int]:
+    """Parse the destination coordinate typed by the user into a square index, if it is valid."""
+    if not to_coord:
+        return None
+    try:
+        to_coord = to_coord.strip().lower()
+        if to_coord:
+            is_valid, _ = validate_coordinate(to_coord)
+            if is_valid:
+                row, col = coordinate_to_position(to_coord)
+                return row * 8 + col
+    except:
+        pass
+    return None
 
-    destination_square = None
-    if hasattr(st.session_state, 'to_coord') and st.session_state.to_coord:
-        try:
-            to_coord = st.session_state.to_coord.strip().lower()
-            if to_coord:
-                is_valid, _ = validate_coordinate(to_coord)
-                if is_valid:
-                    dest_row, dest_col = coordinate_to_position(to_coord)
-                    destination_square = (dest_row, dest_col)
-        except:
-            destination_square = None
-
-    if selected_square and selected_square == (row_idx, col_idx):
-        square_color = "#ffff99"
-
-    elif destination_square and destination_square == (row_idx, col_idx):
-        square_color = "#87ceeb"
-
-    elif possible_moves and (row_idx, col_idx) in possible_moves:
-        if piece == "":
-            square_color = "#90ee90"
-        else:
-            square_color = "#ffb6c1"
 
-    return f"""
-    <div id="{square_id}" 
+# Square markup after its id; only the fields in braces vary between squares
+SQUARE_TMPL = """
             class="square {square_class}" 
             style="
             display: flex;
             align-items: center;
             justify-content: center;
-            font-size: {size//12}px;
+            font-size: {font_size}px;
             font-weight: bold;
-            color: {get_square_color(board_theme, "light_piece") if is_white_piece(piece) else get_square_color(board_theme, "dark_piece")};
-            width: {size//8}px;
-            height: {size//8}px;
+            color: {piece_color};
+            width: {square_size}px;
+            height: {square_size}px;
             background-color: {square_color};
             border: 2px solid transparent;
             ">
@@ -647,18 +699,71 @@ def populate_square_html(
     """
 
 
-def st_chessboard(
-    board: Optional[List[List[str]]] = DEFAULT_BOARD,
-    size: int = 400,
-    key: Optional[str] = "playable_chessboard",
-    board_theme: str = "Default",
-) -> Optional[Dict[str, Any]]:
-    """Create an interactive chessboard component."""
+def square_body_html(
+    piece: str,
+    square_class: str,
+    square_color: str,
+    piece_color: str,
+    square_size: int,
+    font_size: int,
+) -> str:
+    """Build the HTML of a square after its id."""
+    return SQUARE_TMPL.format(
+        square_class=square_class,
+        font_size=font_size,
+        piece_color=piece_color,
+        square_size=square_size,
+        square_color=square_color,
+        piece_symbol=PIECE_SYMBOLS.get(piece, piece),
+    )
+
+
+@lru_cache(maxsize=16)
+def square_html_table(size: int, board_theme: str) -> Dict[Tuple[str, str, Optional[str]], str]:
+    """Build the square HTML for every (piece, square class, highlight) combination of a size and theme."""
+    theme = BOARD_THEMES[board_theme]
+    square_size = size // 8
+    font_size = size // 12
+
+    table = {}
+    for piece in PIECE_SYMBOLS:
+        piece_color = theme["light_piece"] if is_white_piece(piece) else theme["dark_piece"]
+        for square_class in ("light", "dark"):
+            for highlight in (None, "selected", "destination", "target"):
+                if highlight is None:
+                    square_color = theme[square_class]
+                elif highlight == "target":
+                    square_color = "#90ee90" if piece == "" else "#ffb6c1"
+                else:
+                    square_color = SQUARE_HIGHLIGHTS[highlight]
+                table[(piece, square_class, highlight)] = square_body_html(
+                    piece, square_class, square_color, piece_color, square_size, font_size
+                )
+    return table
+
+
+@lru_cache(maxsize=32)
+def square_id_html(key: str) -> Tuple[str, ...]:
+    """Build the opening tag of every square for a component key."""
+    return tuple(f"""
+    <div id="square-{key}-{row}-{col}" """ for row, col in SQUARES)
+
+
+BOARD_FOOTER_HTML = """
+                </div>
+            </div>
+        </div>
+    </div>
+    """
+
 
+@lru_cache(maxsize=32)
+def board_header_html(size: int, key: str) -> str:
+    """Build the board container, coordinate labels and grid opening tag (depends only on size and key)."""
     square_size = size // 8
     coord_size = square_size // 2
 
-    html_content = f"""
+    return f"""
     <div id="chessboard-container-{key}" style="display: flex; justify-content: center; margin: 20px 0;">
         <div style="display: flex; flex-direction: column; align-items: center;">
             
@@ -683,127 +788,167 @@ def st_chessboard(
                 ">
     """
 
-    for row_idx in range(8):
-        for col_idx in range(8):
-            html_content += populate_square_html(
-                board[row_idx][col_idx],
-                board_theme,
-                row_idx,
-                col_idx,
-                key,
-                size,
-            )
-
-    html_content += """
-                </div>
-            </div>
-        </div>
-    </div>
-    """
 
-    return components.html(html_content, height=size + 150)
+@lru_cache(maxsize=64)
+def board_html(
+    board: Board,
+    size: int,
+    key: str,
+    board_theme: str,
+    selected_square: Optional[int],
+    destination_square: Optional[int],
+    possible_moves: int,
+) -> str:
+    """Build the full board HTML; identical inputs across reruns reuse the same string."""
+    table = square_html_table(size, board_theme)
+    square_ids = square_id_html(key)
+    pieces = [piece for board_row in board for piece in board_row]
+
+    parts = [board_header_html(size, key)]
+    for square, piece in enumerate(pieces):
+        if square == selected_square:
+            highlight = "selected"
+        elif square == destination_square:
+            highlight = "destination"
+        elif possible_moves >> square & 1:
+            highlight = "target"
+        else:
+            highlight = None
+        parts.append(square_ids[square])
+        parts.append(table[(piece, SQUARE_PARITY[square], highlight)])
 
+    parts.append(BOARD_FOOTER_HTML)
+    return "".join(parts)
 
-def get_king_position(board: List[List[str]], color: str) -> Optional[Tuple[int, int]]:
-    """Find the position of the king for the given color."""
-    king_piece = "K" if color == "white" else "k"
-    
-    for row in range(8):
-        for col in range(8):
-            if board[row][col] == king_piece:
-                return (row, col)
-    
-    return None
 
+def st_chessboard(
+    board: Optional[Board] = DEFAULT_BOARD,
+    size: int = 400,
+    key: Optional[str] = "playable_chessboard",
+    board_theme: str = "Default",
+) -> Optional[Dict[str, Any]]:
+    """Create an interactive chessboard component."""
+    if not isinstance(board, tuple) or not isinstance(board[0], tuple):
+        board = tuple(map(tuple, board))
+
+    html_content = board_html(
+        board,
+        size,
+        key,
+        board_theme,
+        st.session_state.selected_square,
+        parse_destination_square(st.session_state.get("to_coord")),
+        st.session_state.possible_moves_bb,
+    )
 
-def is_square_attacked(board: List[List[str]], row: int, col: int, by_color: str) -> bool:
-    """Check if a square is attacked by any piece of the given color."""
-    for r in range(8):
-        for c in range(8):
-            piece = board[r][c]
-            if piece == "":
-                continue
-                
-            piece_color = "white" if is_white_piece(piece) else "black"
-            if piece_color != by_color:
-                continue
-                
-            # Use non-castling moves to prevent recursion
-            possible_moves = get_possible_moves(board, r, c, include_castling=False)
-            if (row, col) in possible_moves:
-                return True
-    
-    return False
+    return components.html(html_content, height=size + 150)
 
 
-def is_in_check(board: List[List[str]], color: str) -> bool:
+def is_in_check(board: Board, color: str) -> bool:
     """Check if the king of the given color is in check."""
-    king_pos = get_king_position(board, color)
-    if not king_pos:
+    cache_key = (position_key(board), color)
+    return _memo(IN_CHECK_CACHE, cache_key, lambda: generate_in_check(board, color))
+
+
+def generate_in_check(board: Board, color: str) -> bool:
+    """Compute whether the king of the given color is attacked."""
+    bb = board_from_list(board)
+    king = bb.white_king if color == "white" else bb.black_king
+    if not king:
         return False
     
     opponent_color = "black" if color == "white" else "white"
-    return is_square_attacked(board, king_pos[0], king_pos[1], opponent_color)
+    return is_attacked(bb, lsb(king), opponent_color)
 
 
-def would_be_in_check(board: List[List[str]], from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
-    """Check if making a move would leave the current player's king in check."""
-    moving_piece = board[from_row][from_col]
-    if not moving_piece:
-        return True
-    
-    player_color = "white" if is_white_piece(moving_piece) else "black"
-    
-    temp_board = copy.deepcopy(board)
-    temp_board[to_row][to_col] = temp_board[from_row][from_col]
-    temp_board[from_row][from_col] = ""
-    
-    return is_in_check(temp_board, player_color)
+def leaves_king_in_check(bb: BitBoard, from_sq: int, to_sq: int, moving: str, captured: str) -> bool:
+    """Make the move on the bitboard, test the mover's king, then unmake it."""
+    is_white = is_white_piece(moving)
+    bb.toggle_move(from_sq, to_sq, moving, captured)
+    king = bb.white_king if is_white else bb.black_king
+    in_check = bool(king) and is_attacked(bb, lsb(king), "black" if is_white else "white")
+    bb.toggle_move(from_sq, to_sq, moving, captured)
+    return in_check
 
 
-def get_legal_moves(board: List[List[str]], row: int, col: int) -> List[Tuple[int, int]]:
+def get_legal_moves(board: Board, row: int, col: int) -> List[Tuple[int, int]]:
     """Get all legal moves for a piece (excluding moves that would put own king in check)."""
-    possible_moves = get_possible_moves(board, row, col, include_castling=True)
-    legal_moves = []
+    return mask_to_squares(get_legal_moves_mask(board, row, col))
+
+
+def get_legal_moves_mask(board: Board, row: int, col: int) -> int:
+    """Get the legal moves of a piece as a square mask."""
+    piece = board[row][col]
+    if piece == "":
+        return 0
+    
+    cache_key = (position_key(board), row, col, get_special_move_state(piece, True))
+    return _memo(LEGAL_MOVES_CACHE, cache_key, lambda: generate_legal_moves_mask(board, row, col))
+
+
+def generate_legal_moves_mask(board: Board, row: int, col: int) -> int:
+    """Generate the legal moves of a piece by testing each possible move on a bitboard."""
+    possible_moves = get_possible_moves_mask(board, row, col, include_castling=True)
+    if not possible_moves:
+        return 0
+    
+    bb = board_from_list(board)
+    from_sq = row * 8 + col
+    moving_piece = board[row][col]
+    
+    # Away from check, only king moves and pinned pieces can expose the king
+    if PIECE_CODE[moving_piece] & 7 != 6:
+        pins, checkers = pins_and_checkers(bb, piece_color(moving_piece))
+        if not checkers:
+            return possible_moves & pins.get(from_sq, MASK_64)
     
-    for to_row, to_col in possible_moves:
-        if not would_be_in_check(board, row, col, to_row, to_col):
-            legal_moves.append((to_row, to_col))
+    legal_moves = 0
+    while possible_moves:
+        to_sq, possible_moves = pop_lsb(possible_moves)
+        if not leaves_king_in_check(bb, from_sq, to_sq, moving_piece, board[to_sq >> 3][to_sq & 7]):
+            legal_moves |= 1 << to_sq
     
     return legal_moves
 
 
-def has_legal_moves(board: List[List[str]], color: str) -> bool:
+def has_legal_moves(board: Board, color: str) -> bool:
     """Check if the given color has any legal moves."""
-    for row in range(8):
-        for col in range(8):
-            piece = board[row][col]
-            if piece == "":
-                continue
-                
-            piece_color = "white" if is_white_piece(piece) else "black"
-            if piece_color != color:
-                continue
-                
-            legal_moves = get_legal_moves(board, row, col)
-            if legal_moves:
+    bb = board_from_list(board)
+    # Try the most mobile pieces first so positions with moves return early
+    for piece in MOBILITY_ORDER[color]:
+        pieces = getattr(bb, PIECE_FIELDS[piece])
+        while pieces:
+            sq, pieces = pop_lsb(pieces)
+            if get_legal_moves_mask(board, sq >> 3, sq & 7):
                 return True
     
     return False
 
 
-def is_checkmate(board: List[List[str]], color: str) -> bool:
+def is_checkmate(board: Board, color: str) -> bool:
     """Check if the given color is in checkmate."""
     return is_in_check(board, color) and not has_legal_moves(board, color)
 
 
-def is_stalemate(board: List[List[str]], color: str) -> bool:
+def is_stalemate(board: Board, color: str) -> bool:
     """Check if the given color is in stalemate."""
     return not is_in_check(board, color) and not has_legal_moves(board, color)
 
 
-def get_game_status(board: List[List[str]], current_player: str) -> str:
-    """Get the current game status."""
+def get_game_status(board: Board, current_player: str) -> str:
+    """Get the current game status, memoized per position."""
+    king_piece = "K" if current_player == "white" else "k"
+    cache_key = (
+        position_key(board),
+        current_player,
+        get_special_move_state("p", True),
+        get_special_move_state(king_piece, True),
+    )
+    return _memo(GAME_STATUS_CACHE, cache_key, lambda: generate_game_status(board, current_player))
+
+
+def generate_game_status(board: Board, current_player: str) -> str:
+    """Compute the game status from check and legal-move tests."""
     if is_checkmate(board, current_player):
         winner = "black" if current_player == "white" else "white"
         return f"checkmate_{winner}_wins"
@@ -815,7 +960,7 @@ def get_game_status(board: List[List[str]], current_player: str) -> str:
         return "active"
 
 
-def is_en_passant_move(board: List[List[str]], from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
+def is_en_passant_move(board: Board, from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
     """Check if a move is an en passant capture."""
     piece = board[from_row][from_col]
     if piece.lower() != 'p':
@@ -826,17 +971,17 @@ def is_en_passant_move(board: List[List[str]], from_row: int, from_col: int, to_
         return False
     
     # Check if last move enables en passant
-    if not (hasattr(st.session_state, 'last_move') and st.session_state.last_move):
+    last_move = st.session_state.last_move
+    if not last_move:
         return False
     
-    last_move = st.session_state.last_move
     return (last_move['piece'].lower() == 'p' and
             abs(last_move['to_row'] - last_move['from_row']) == 2 and
             last_move['to_col'] == to_col and
             last_move['to_row'] == from_row)
 
 
-def is_castling_move(board: List[List[str]], from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
+def is_castling_move(board: Board, from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
     """Check if a move is a castling move."""
     piece = board[from_row][from_col]
     if piece.lower() != 'k':
@@ -855,42 +1000,50 @@ def get_castling_type(from_col: int, to_col: int) -> str:
     return ""
 
 
+def get_castling_rights(board: Board) -> str:
+    """Get the castling rights in FEN notation (e.g. 'KQkq', or '-' for none)."""
+    rights = ""
+    for color, king_piece, rook_piece in (("white", "K", "R"), ("black", "k", "r")):
+        if st.session_state.king_moved[color]:
+            continue
+        starting_row = 7 if color == "white" else 0
+        rook_moved = st.session_state.rook_moved[color]
+        if not rook_moved["kingside"] and board[starting_row][7] == rook_piece:
+            rights += king_piece
+        if not rook_moved["queenside"] and board[starting_row][0] == rook_piece:
+            rights += "Q" if color == "white" else "q"
+    return rights or "-"
+
+
+def get_en_passant_square() -> str:
+    """Get the en passant target square in FEN notation, or '-' if the last move was not a pawn double step."""
+    last_move = st.session_state.last_move
+    if not last_move or last_move['piece'].lower() != 'p':
+        return "-"
+    if abs(last_move['to_row'] - last_move['from_row']) != 2:
+        return "-"
+    return position_to_coordinate((last_move['from_row'] + last_move['to_row']) // 2, last_move['to_col'])
+
+
+def _captured_value(color: str) -> int:
+    """Get the total material value of pieces captured by a color."""
+    return sum(map(PIECE_VALUES.__getitem__, st.session_state.captured_pieces.get(color, ())))
+
+
 def get_captured_pieces_display(color: str) -> tuple[str, int]:
     """Get captured pieces for display, returning (formatted_string, total_value)."""
-    if not hasattr(st.session_state, 'captured_pieces'):
-        return "", 0
-    
     captured = st.session_state.captured_pieces.get(color, [])
     if not captured:
         return "", 0
     
-    piece_values = {
-        'p': 1, 'P': 1,  # Pawn
-        'n': 3, 'N': 3,  # Knight
-        'b': 3, 'B': 3,  # Bishop
-        'r': 5, 'R': 5,  # Rook
-        'q': 9, 'Q': 9,  # Queen
-        'k': 0, 'K': 0   # King (shouldn't be captured, but just in case)
-    }
-    
-    captured_sorted = sorted(captured, key=lambda p: piece_values.get(p, 0), reverse=True)
+    captured_sorted = "".join(sorted(captured, key=PIECE_VALUES.__getitem__, reverse=True))
     
-    display_pieces = [PIECE_SYMBOLS.get(piece, piece) for piece in captured_sorted]
-    
-    total_value = sum(piece_values.get(piece, 0) for piece in captured)
-    
-    return " ".join(display_pieces), total_value
+    return " ".join(captured_sorted.translate(PIECE_SYMBOL_TABLE)), _captured_value(color)
 
 
 def get_material_advantage() -> tuple[str, int]:
     """Get material advantage information."""
-    if not hasattr(st.session_state, 'captured_pieces'):
-        return "", 0
-    
-    _, white_captured_value = get_captured_pieces_display("white")
-    _, black_captured_value = get_captured_pieces_display("black")
-    
-    advantage = white_captured_value - black_captured_value
+    advantage = _captured_value("white") - _captured_value("black")
     
     if advantage > 0:
         return "white", advantage
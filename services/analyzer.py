@@ -1,60 +1,36 @@
 import os
-from typing import List
-from openai import OpenAI
+import threading
+from functools import lru_cache
+from typing import Iterator, Sequence
+import httpx
+from cachetools import TTLCache
+from openai import DefaultHttpxClient, OpenAI
 from dotenv import load_dotenv
 
+# httpx only speaks HTTP/2 when the optional h2 package is installed
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Finished answers keyed by the full prompt, shared by all sessions
+ANSWER_CACHE: TTLCache = TTLCache(maxsize=256, ttl=3600)
+ANSWER_CACHE_LOCK = threading.Lock()
 
-def analyze_game(
-    game_history: str,
-    selected_piece: str,
-    selected_move: str,
-    question: str,
-    current_player: str,
-    current_board: List[List[str]],
-) -> str:
-    """Analyze the game history and return a summary of the game."""
-    if not OPENAI_API_KEY:
-        return "Please set your OPENAI_API_KEY environment variable to use the AI assistant."
-
-    client = OpenAI(api_key=OPENAI_API_KEY)
-
-    prompt = f"""You are a chess expert analyzing a chess position. Please provide helpful analysis and advice.
+PROMPT_TEMPLATE = """You are a chess expert analyzing a chess position. Please provide helpful analysis and advice.
 
 Use markdown to format your response.
 Use bold to highlight important points.
 Use italic to highlight chess concepts.
 Use code blocks to format chess moves.
 
-The BOARD structure is a 8x8 matrix of strings. The strings are the pieces on the board. The empty squares are represented by an empty string. The pieces are represented by the following characters:
-- r: black rook
-- n: black knight
-- b: black bishop
-- q: black queen
-- k: black king
-- p: black pawn
-- : empty square
-- R: white rook
-- N: white knight
-- B: white bishop
-- Q: white queen
-- K: white king
-- P: white pawn
-
-The board is as follows:
-[
-    ["r", "n", "b", "q", "k", "b", "n", "r"],
-    ["p", "p", "p", "p", "p", "p", "p", "p"],
-    ["", "", "", "", "", "", "", ""],
-    ["", "", "", "", "", "", "", ""],
-    ["", "", "", "", "", "", "", ""],
-    ["", "", "", "", "", "", "", ""],
-    ["P", "P", "P", "P", "P", "P", "P", "P"],
-    ["R", "N", "B", "Q", "K", "B", "N", "R"],
-]
+The position is given in FEN (Forsyth-Edwards Notation): ranks 8 to 1 separated by "/", uppercase letters are white pieces (K, Q, R, B, N, P), lowercase letters are black pieces, and digits count consecutive empty squares. The ranks are followed by the side to move (w/b), castling rights (KQkq or -) and the en passant target square (or -).
+Example (starting position): rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -
 
 To describe proposed moves, use as example the following format:
 - "Move from e2 to e4"
@@ -67,7 +43,7 @@ Current Player: {current_player}
 Game History: {game_history} (If there is no game history, say "No moves yet")
 Selected Piece: {selected_piece}
 Available Moves: {selected_move}
-Current Board: {current_board}
+Current Position (FEN): {fen}
 
 Question: {question}
 
@@ -77,13 +53,93 @@ Please provide a clear, detailed analysis focusing on:
 3. Educational insights about chess concepts involved (if applicable, highlight if the move is book moves, book moves are well known chess positions, mention the name of the book move if applicable or chess concepts based on the current board)
 
 Keep response under 150 words. Be direct and practical."""
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=800,
-            temperature=0.7,
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error: {str(e)}. Please check your API key and try again."
+
+
+@lru_cache(maxsize=1)
+def get_client() -> OpenAI:
+    """Get the shared OpenAI client, keeping its connection pool alive across calls."""
+    return OpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=DefaultHttpxClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=4),
+        ),
+    )
+
+
+def board_to_fen(
+    board: Sequence[Sequence[str]],
+    side: str,
+    castling: str = "-",
+    en_passant: str = "-",
+) -> str:
+    """Encode a board as the first four FEN fields (placement, side, castling, en passant)."""
+    ranks = []
+    for row in board:
+        rank = ""
+        empty = 0
+        for piece in row:
+            if piece:
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += piece
+            else:
+                empty += 1
+        if empty:
+            rank += str(empty)
+        ranks.append(rank)
+    return f"{'/'.join(ranks)} {side[0]} {castling or '-'} {en_passant or '-'}"
+
+
+def analyze_game(
+    game_history: str,
+    selected_piece: str,
+    selected_move: str,
+    question: str,
+    current_player: str,
+    current_board: Sequence[Sequence[str]],
+    castling: str = "-",
+    en_passant: str = "-",
+) -> Iterator[str]:
+    """Analyze the game history and stream the AI's answer as text chunks; API errors propagate to the consumer."""
+    if not OPENAI_API_KEY:
+        yield "Please set your OPENAI_API_KEY environment variable to use the AI assistant."
+        return
+
+    fen = board_to_fen(current_board, current_player, castling, en_passant)
+
+    prompt = PROMPT_TEMPLATE.format_map(
+        {
+            "current_player": current_player,
+            "game_history": game_history,
+            "selected_piece": selected_piece,
+            "selected_move": selected_move,
+            "fen": fen,
+            "question": question,
+        }
+    )
+    # The same question about the same position can reuse the earlier answer
+    with ANSWER_CACHE_LOCK:
+        cached = ANSWER_CACHE.get(prompt)
+    if cached is not None:
+        yield cached
+        return
+
+    client = get_client()
+    # The prompt caps the answer at 150 words, so 300 tokens is plenty
+    stream = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=300,
+        temperature=0.7,
+        stream=True,
+    )
+    parts = []
+    for chunk in stream:
+        if chunk.choices:
+            text = chunk.choices[0].delta.content or ""
+            parts.append(text)
+            yield text
+    with ANSWER_CACHE_LOCK:
+        ANSWER_CACHE[prompt] = "".join(parts)
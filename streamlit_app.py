@@ -1,27 +1,40 @@
+from itertools import chain
+
 import streamlit as st
 
 from components import (
     st_chessboard,
     initialize_game_state,
     reset_game,
-    get_legal_moves,
+    get_legal_moves_mask,
     is_valid_move,
     make_move,
     get_game_status,
     coordinate_to_position,
     position_to_coordinate,
+    square_to_position,
+    mask_to_coordinates,
     validate_coordinate,
     validate_coordinate_with_piece,
     validate_move,
     is_en_passant_move,
     is_castling_move,
     get_castling_type,
+    get_castling_rights,
+    get_en_passant_square,
     get_captured_pieces_display,
     get_material_advantage,
 )
 
 from services.analyzer import analyze_game
 
+QUICK_QUESTIONS = {
+    "What is the best move?": "What is the best move in this position?",
+    "Analyze position": "Please analyze the current position and give me strategic advice.",
+    "What did I do wrong?": "What did I do wrong in my last move? How could I have played better?",
+    "Explain this move": "Can you explain the chess concept or tactic involved in this position?",
+}
+
 
 def handle_piece_selection(from_coord: str, to_coord: str = None):
     """Handle piece selection and movement."""
@@ -35,11 +48,11 @@ def handle_piece_selection(from_coord: str, to_coord: str = None):
     current_player = st.session_state.current_player
 
     if not to_coord:
-        st.session_state.selected_square = (from_row, from_col)
-        st.session_state.possible_moves = get_legal_moves(
+        st.session_state.selected_square = from_row * 8 + from_col
+        st.session_state.possible_moves_bb = get_legal_moves_mask(
             st.session_state.chess_board, from_row, from_col
         )
-        legal_count = len(st.session_state.possible_moves)
+        legal_count = st.session_state.possible_moves_bb.bit_count()
         if legal_count > 0:
             st.success(f"Selected {piece} at {from_coord} ({legal_count} legal moves)")
         else:
@@ -53,8 +66,14 @@ def handle_piece_selection(from_coord: str, to_coord: str = None):
 
     to_row, to_col = coordinate_to_position(to_coord)
 
-    legal_moves = get_legal_moves(st.session_state.chess_board, from_row, from_col)
-    if (to_row, to_col) in legal_moves:
+    from_sq = from_row * 8 + from_col
+    if st.session_state.selected_square == from_sq:
+        legal_mask = st.session_state.possible_moves_bb
+    else:
+        legal_mask = get_legal_moves_mask(
+            st.session_state.chess_board, from_row, from_col
+        )
+    if legal_mask >> (to_row * 8 + to_col) & 1:
         move_description = f"Moved {piece} from {from_coord} to {to_coord}"
 
         if is_en_passant_move(
@@ -88,7 +107,7 @@ def handle_piece_selection(from_coord: str, to_coord: str = None):
         )
 
         st.session_state.selected_square = None
-        st.session_state.possible_moves = []
+        st.session_state.possible_moves_bb = 0
         st.session_state.clear_inputs = True
 
         st.success(move_description)
@@ -131,40 +150,39 @@ def render_sidebar_board_options():
     return size, board_theme
 
 
+def set_quick_question():
+    """Copy the chosen quick question into the AI question box."""
+    label = st.session_state.quick_question
+    if label:
+        st.session_state.ai_question_text_input = QUICK_QUESTIONS[label]
+        st.session_state.quick_question = None
+
+
 def render_ai_assistant():
     """Render the AI assistant section in the sidebar."""
     with st.sidebar:
         st.subheader("AI Assistant")
 
-        if "ai_question_input" not in st.session_state:
-            st.session_state.ai_question_input = ""
+        # The box is driven only through its key; a sent question is cleared on the next run
+        if st.session_state.get("clear_ai_question", True):
+            st.session_state.ai_question_text_input = ""
+            st.session_state.clear_ai_question = False
 
         ai_question = st.text_area(
             "Ask the AI a question", 
             placeholder="What is the best move?",
-            value=st.session_state.ai_question_input,
             key="ai_question_text_input"
         )
 
-        st.write("**Quick Questions:**")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            if st.button("What is the best move?", use_container_width=True):
-                st.session_state.ai_question_input = "What is the best move in this position?"
-                st.rerun()
-            if st.button("Analyze position", use_container_width=True):
-                st.session_state.ai_question_input = "Please analyze the current position and give me strategic advice."
-                st.rerun()
-
-        with col2:
-            if st.button("What did I do wrong?", use_container_width=True):
-                st.session_state.ai_question_input = "What did I do wrong in my last move? How could I have played better?"
-                st.rerun()
-            if st.button("Explain this move", use_container_width=True):
-                st.session_state.ai_question_input = "Can you explain the chess concept or tactic involved in this position?"
-                st.rerun()
+        st.radio(
+            "**Quick Questions:**",
+            list(QUICK_QUESTIONS),
+            index=None,
+            key="quick_question",
+            on_change=set_quick_question,
+        )
 
+        ai_stream = None
         if st.button(
             "Ask AI",
             type="primary",
@@ -172,52 +190,61 @@ def render_ai_assistant():
             disabled=not ai_question.strip(),
         ):
             if ai_question.strip():
-                with st.spinner("Analyzing position..."):
-                    try:
-                        game_history = (
-                            " | ".join(st.session_state.move_history)
-                            if st.session_state.move_history
-                            else "No moves yet"
-                        )
+                game_history = (
+                    " | ".join(st.session_state.move_history)
+                    if st.session_state.move_history
+                    else "No moves yet"
+                )
 
-                        selected_piece = ""
-                        selected_move = ""
-                        if st.session_state.selected_square:
-                            row, col = st.session_state.selected_square
-                            piece = st.session_state.chess_board[row][col]
-                            square_name = position_to_coordinate(row, col)
-                            selected_piece = f"{piece} on {square_name}"
-
-                            if st.session_state.possible_moves:
-                                moves_list = [
-                                    position_to_coordinate(r, c)
-                                    for r, c in st.session_state.possible_moves
-                                ]
-                                selected_move = (
-                                    f"Possible moves: {', '.join(moves_list)}"
-                                )
-
-                        response = analyze_game(
-                            game_history=game_history,
-                            selected_piece=selected_piece,
-                            selected_move=selected_move,
-                            question=ai_question,
-                            current_player=st.session_state.current_player,
-                            current_board=st.session_state.chess_board,
+                selected_piece = ""
+                selected_move = ""
+                if st.session_state.selected_square is not None:
+                    row, col = square_to_position(st.session_state.selected_square)
+                    piece = st.session_state.chess_board[row][col]
+                    square_name = position_to_coordinate(row, col)
+                    selected_piece = f"{piece} on {square_name}"
+
+                    if st.session_state.possible_moves_bb:
+                        moves_list = mask_to_coordinates(
+                            st.session_state.possible_moves_bb
+                        )
+                        selected_move = (
+                            f"Possible moves: {', '.join(moves_list)}"
                         )
 
-                        st.session_state.ai_response = response
-                        st.session_state.ai_question_input = ""
-                        st.success("Analysis complete!")
-
-                    except Exception as e:
-                        st.error(f"Error getting AI response: {str(e)}")
-                        st.session_state.ai_response = "Sorry, I couldn't analyze the position right now. Please try again."
+                ai_stream = analyze_game(
+                    game_history=game_history,
+                    selected_piece=selected_piece,
+                    selected_move=selected_move,
+                    question=ai_question,
+                    current_player=st.session_state.current_player,
+                    current_board=st.session_state.chess_board,
+                    castling=get_castling_rights(st.session_state.chess_board),
+                    en_passant=get_en_passant_square(),
+                )
+                st.session_state.clear_ai_question = True
             else:
                 st.warning("Please enter a question first!")
 
         st.subheader("AI Response")
-        if st.session_state.ai_response:
+        if ai_stream is not None:
+            # Render tokens as they arrive and keep the full text for later reruns
+            response = st.empty()
+            try:
+                with st.spinner("Analyzing position..."):
+                    first_chunk = next(ai_stream, "")
+                with response.container():
+                    st.session_state.ai_response = st.write_stream(
+                        chain([first_chunk], ai_stream)
+                    )
+                st.success("Analysis complete!")
+            except Exception as e:
+                # Replace any partial answer rather than appending the error to it
+                st.session_state.ai_response = (
+                    f"Error: {str(e)}. Please check your API key and try again."
+                )
+                response.error(st.session_state.ai_response)
+        elif st.session_state.ai_response:
             st.markdown(st.session_state.ai_response)
         else:
             st.info("The AI's analysis and recommendations will appear here after you ask a question.")
@@ -247,6 +274,7 @@ def render_move_interface():
         or st.session_state.game_status == "stalemate"
     )
 
+    from_valid = move_valid = False
     if from_coord and not game_over:
         from_valid, from_error = validate_coordinate_with_piece(from_coord, True)
 
@@ -254,12 +282,9 @@ def render_move_interface():
             st.error(f"From coordinate: {from_error}")
         else:
             handle_piece_selection(from_coord)
-            if st.session_state.possible_moves:
+            if st.session_state.possible_moves_bb:
                 moves_str = ", ".join(
-                    [
-                        position_to_coordinate(r, c)
-                        for r, c in st.session_state.possible_moves
-                    ]
+                    mask_to_coordinates(st.session_state.possible_moves_bb)
                 )
                 st.info(f"Legal moves: {moves_str}")
     elif from_coord and game_over:
@@ -288,14 +313,7 @@ def render_move_interface():
         if not to_valid:
             st.error(f"To coordinate: {to_error}")
 
-    can_make_move = False
-    if not game_over:
-        if from_coord and to_coord:
-            move_valid, _ = validate_move(from_coord, to_coord)
-            can_make_move = move_valid
-        elif from_coord:
-            from_valid, _ = validate_coordinate_with_piece(from_coord, True)
-            can_make_move = from_valid
+    can_make_move = not game_over and (move_valid if to_coord else from_valid)
 
     if st.button(
         "Make Move", type="primary", disabled=not can_make_move or game_over
@@ -340,19 +358,16 @@ def render_game_info():
     """Render the game information panel (selected piece, captures, move history)."""
     st.subheader("Game Information")
 
-    if st.session_state.selected_square:
-        row, col = st.session_state.selected_square
+    if st.session_state.selected_square is not None:
+        row, col = square_to_position(st.session_state.selected_square)
         piece = st.session_state.chess_board[row][col]
         square_name = position_to_coordinate(row, col)
         st.write(f"**Selected:** {piece} on {square_name}")
-        st.write(f"**Possible moves:** {len(st.session_state.possible_moves)}")
+        st.write(f"**Possible moves:** {st.session_state.possible_moves_bb.bit_count()}")
 
-        if st.session_state.possible_moves:
+        if st.session_state.possible_moves_bb:
             moves_str = ", ".join(
-                [
-                    position_to_coordinate(r, c)
-                    for r, c in st.session_state.possible_moves
-                ]
+                mask_to_coordinates(st.session_state.possible_moves_bb)
             )
             st.write(f"**Available moves:** {moves_str}")
     else:
@@ -402,11 +417,6 @@ def main():
     if "ai_response" not in st.session_state:
         st.session_state.ai_response = ""
 
-    if st.session_state.game_status == "active":
-        st.session_state.game_status = get_game_status(
-            st.session_state.chess_board, st.session_state.current_player
-        )
-
     size, board_theme = render_sidebar_board_options()
     render_ai_assistant()
 
@@ -0,0 +1,145 @@
+import random
+from typing import Iterator, Tuple
+
+import pytest
+import streamlit as st
+
+from components import initialize_game_state, make_move
+from components.bitboard import (
+    BISHOP_DIRECTIONS,
+    ROOK_DIRECTIONS,
+    bishop_attacks,
+    board_from_list,
+    list_from_board,
+    mask_to_squares,
+    ray_attacks,
+    rook_attacks,
+    zobrist_hash,
+)
+from components.st_chessboard import (
+    Board,
+    generate_in_check,
+    get_legal_moves_mask,
+    get_possible_moves_mask,
+    position_key,
+    replace_squares,
+)
+
+GAMES = 10
+PLIES = 80
+
+
+def new_game():
+    """Start from a fresh session state, as a new browser session would."""
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    initialize_game_state()
+
+
+def player_squares(board: Board, player: str) -> Iterator[Tuple[int, int]]:
+    """Yield the squares holding the given player's pieces."""
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece and piece.isupper() == (player == "white"):
+                yield row, col
+
+
+def random_games(seed: int) -> Iterator[Tuple[Board, str]]:
+    """Play seeded random legal games through make_move, yielding each position and side to move."""
+    rng = random.Random(seed)
+    for _ in range(GAMES):
+        new_game()
+        for _ in range(PLIES):
+            board = st.session_state.chess_board
+            player = st.session_state.current_player
+            yield board, player
+            moves = [
+                (row, col, to_row, to_col)
+                for row, col in player_squares(board, player)
+                for to_row, to_col in mask_to_squares(get_legal_moves_mask(board, row, col))
+            ]
+            if not moves:
+                break
+            row, col, to_row, to_col = rng.choice(moves)
+            st.session_state.chess_board = make_move(board, row, col, to_row, to_col)
+            st.session_state.current_player = "black" if player == "white" else "white"
+
+
+def board_after(board: Board, from_row: int, from_col: int, to_row: int, to_col: int) -> Board:
+    """Apply a move to a copy of the board, including the pawn removed by en passant."""
+    piece = board[from_row][from_col]
+    changes = {(from_row, from_col): "", (to_row, to_col): piece}
+    if piece in "Pp" and from_col != to_col and not board[to_row][to_col]:
+        changes[(from_row, to_col)] = ""
+    return replace_squares(board, changes)
+
+
+@pytest.mark.parametrize(
+    "attacks, directions",
+    [(rook_attacks, ROOK_DIRECTIONS), (bishop_attacks, BISHOP_DIRECTIONS)],
+)
+def test_magic_attacks_match_ray_scan(attacks, directions):
+    rng = random.Random(1)
+    for _ in range(20000):
+        sq = rng.randrange(64)
+        occ = rng.getrandbits(64) & rng.getrandbits(64)
+        assert attacks(sq, occ) == ray_attacks(sq, occ, directions)
+
+
+def test_legal_moves_match_copy_and_check():
+    for board, player in random_games(seed=2):
+        for row, col in player_squares(board, player):
+            expected = 0
+            for to_row, to_col in mask_to_squares(get_possible_moves_mask(board, row, col)):
+                if not generate_in_check(board_after(board, row, col, to_row, to_col), player):
+                    expected |= 1 << (to_row * 8 + to_col)
+            assert get_legal_moves_mask(board, row, col) == expected
+
+
+def test_legal_moves_match_python_chess():
+    chess = pytest.importorskip("chess")
+
+    def square_index(square: int) -> int:
+        return (7 - chess.square_rank(square)) * 8 + chess.square_file(square)
+
+    rng = random.Random(3)
+    for _ in range(GAMES):
+        new_game()
+        reference = chess.Board()
+        for _ in range(PLIES):
+            board = st.session_state.chess_board
+            player = st.session_state.current_player
+            expected = {}
+            for move in reference.legal_moves:
+                from_sq = square_index(move.from_square)
+                expected[from_sq] = expected.get(from_sq, 0) | 1 << square_index(move.to_square)
+            ours = {}
+            for row, col in player_squares(board, player):
+                mask = get_legal_moves_mask(board, row, col)
+                if mask:
+                    ours[row * 8 + col] = mask
+            assert ours == expected, reference.fen()
+
+            moves = list(reference.legal_moves)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            # The app has no promotion, so the game ends where python-chess would promote
+            if move.promotion:
+                break
+            from_row, from_col = divmod(square_index(move.from_square), 8)
+            to_row, to_col = divmod(square_index(move.to_square), 8)
+            st.session_state.chess_board = make_move(board, from_row, from_col, to_row, to_col)
+            st.session_state.current_player = "black" if player == "white" else "white"
+            reference.push(move)
+
+
+def test_incremental_zobrist_key_matches_full_hash():
+    for board, _ in random_games(seed=4):
+        assert position_key(board) == zobrist_hash(board)
+
+
+def test_bitboard_round_trips_to_list_board():
+    for board, _ in random_games(seed=5):
+        assert list_from_board(board_from_list(board)) == [list(row) for row in board]